@@ -0,0 +1,133 @@
+"""
+Optional persistent inference daemon.
+
+Every CLI invocation normally pays the full model load (seconds for the
+PyTorch weights or the ONNX session init). Running
+
+    python -m commonforms.daemon
+
+keeps an FFDNetDetector resident behind a unix socket; `prepare_form`
+automatically routes inference through the daemon when the socket exists and
+falls back to in-process inference otherwise.
+
+Protocol: the client sends one pickled `(pdf_bytes, options)` tuple and reads
+back one pickled `{"results": ...}` or `{"error": ...}` dict. Unpickling is
+code execution, so the daemon chmods the socket to 0600 at startup — anyone
+who can connect is trusted exactly as much as the user running the daemon.
+See config/commonforms-daemon.service for a systemd unit.
+"""
+
+from __future__ import annotations
+from argparse import ArgumentParser
+
+import os
+import pickle
+import socket
+import socketserver
+
+DEFAULT_SOCKET_PATH = "/run/commonforms/ffdnet.sock"
+
+
+def socket_path() -> str:
+    return os.environ.get("COMMONFORMS_SOCKET", DEFAULT_SOCKET_PATH)
+
+
+def infer_via_daemon(pdf_bytes: bytes, options: dict) -> dict | None:
+    """
+    Try to run widget extraction on a resident daemon. Returns the results
+    dict, or None when no daemon is listening (or it misbehaves) so the
+    caller can fall back to in-process inference.
+    """
+    path = socket_path()
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(path)
+            with sock.makefile("rwb") as stream:
+                pickle.dump((pdf_bytes, options), stream)
+                stream.flush()
+                response = pickle.load(stream)
+    except (OSError, pickle.PickleError, EOFError):
+        return None
+
+    if "results" not in response:
+        return None
+    return response["results"]
+
+
+class FFDNetRequestHandler(socketserver.StreamRequestHandler):
+    # drop a client that stalls mid-read/write rather than wedging the
+    # single-threaded server forever
+    timeout = 60
+
+    def handle(self):
+        # imported lazily so the client half of this module stays cheap
+        from commonforms.inference import FFDNetDetector, render_pdf
+
+        try:
+            pdf_bytes, options = pickle.load(self.rfile)
+            detector = FFDNetDetector(
+                options.get("model_or_path", "FFDNet-L"),
+                device=options.get("device", "cpu"),
+                fast=options.get("fast", False),
+                precision=options.get("precision", "bf16"),
+            )
+            # match the in-process path: the fast/ONNX model runs at 1216
+            target_size = 1216 if options.get("fast") else options.get(
+                "image_size", 1600
+            )
+            pages = render_pdf(pdf_bytes, target_size=target_size)
+            results = detector.extract_widgets(
+                pages,
+                confidence=options.get("confidence", 0.3),
+                image_size=options.get("image_size", 1600),
+                augment=options.get("augment", False),
+            )
+            response = {"results": results}
+        except Exception as exc:
+            response = {"error": repr(exc)}
+
+        pickle.dump(response, self.wfile)
+
+
+def main():
+    from commonforms.inference import FFDNetDetector
+
+    parser = ArgumentParser(
+        prog="commonforms-daemon",
+        description="Keep an FFDNet model resident and serve inference requests",
+    )
+    parser.add_argument(
+        "--socket", default=socket_path(), help="Unix socket path to listen on"
+    )
+    parser.add_argument(
+        "--model", default="FFDNet-L", help="Model to preload at startup"
+    )
+    parser.add_argument(
+        "--device", default="cpu", help="Which device to use for inference."
+    )
+    parser.add_argument(
+        "--fast", action="store_true", help="Preload the ONNX model instead of .pt"
+    )
+
+    args = parser.parse_args()
+
+    # warm the module-level model caches so the first request is fast
+    FFDNetDetector(args.model, device=args.device, fast=args.fast)
+
+    socket_dir = os.path.dirname(args.socket)
+    if socket_dir:
+        os.makedirs(socket_dir, exist_ok=True)
+    if os.path.exists(args.socket):
+        os.unlink(args.socket)
+
+    with socketserver.UnixStreamServer(args.socket, FFDNetRequestHandler) as server:
+        # the wire protocol is pickle, so only the owning user may connect
+        os.chmod(args.socket, 0o600)
+        server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,6 @@
+from io import BytesIO
+from typing import BinaryIO
+
 from pypdf import PdfWriter, PdfReader
 from pypdf.annotations import AnnotationDictionary
 from pypdf.generic import (
@@ -11,16 +14,25 @@ from pypdf.generic import (
 from commonforms.utils import BoundingBox
 
 
-def rect_for(bounding_box: BoundingBox, page) -> ArrayObject:
+def _page_metrics(page) -> tuple[float, float, float, float]:
+    """
+    (x0, y0, width, height) constants for mapping normalized bounding boxes
+    onto a page; computed once per page and reused for every widget on it.
+    """
     # because the PDFs are rendered to images with the CropBox, we need to use
     # that as the offset for where we insert the widgets
-    page = page.cropbox if page.cropbox else page.mediabox
-    # here I'm flipping the page.top/page.bottom to change from top-left origin
+    box = page.cropbox if page.cropbox else page.mediabox
+    # here I'm flipping the box.top/box.bottom to change from top-left origin
     # to bottom-right origin; this results in a negative height, but the math
     # works out in the end
-    page_x0, page_y0, page_x1, page_y1 = (page.left, page.top, page.right, page.bottom)
-    page_width = page_x1 - page_x0
-    page_height = page_y1 - page_y0
+    page_x0, page_y0, page_x1, page_y1 = (box.left, box.top, box.right, box.bottom)
+    return page_x0, page_y0, page_x1 - page_x0, page_y1 - page_y0
+
+
+def rect_for(
+    bounding_box: BoundingBox, metrics: tuple[float, float, float, float]
+) -> ArrayObject:
+    page_x0, page_y0, page_width, page_height = metrics
 
     x0 = page_x0 + (bounding_box.x0 * page_width)
     y0 = page_y0 + (bounding_box.y1 * page_height)
@@ -112,11 +124,26 @@ class Signature(AnnotationDictionary):
 
 
 class PyPdfFormCreator:
-    def __init__(self, input_path: str):
-        self.reader = PdfReader(input_path)
+    def __init__(
+        self,
+        input_pdf: str | bytes | BinaryIO,
+        keep_existing_fields: bool = True,
+    ):
+        # accept raw bytes so callers that already read the file (e.g.
+        # prepare_form, which shares them with the renderer) don't force a
+        # second disk read and XREF parse
+        if isinstance(input_pdf, bytes):
+            input_pdf = BytesIO(input_pdf)
+        self.reader = PdfReader(input_pdf)
         # NOTE: Commenting out add_form_topname as it causes lazy loading issues with pages
         # self.reader.add_form_topname("original")
+        # always clone: it preserves document-level structure (outlines,
+        # metadata, named destinations, viewer preferences) that a
+        # page-by-page copy drops, and pypdf's add_page deep-clones each page
+        # anyway so avoiding the clone saves nothing
         self.writer = PdfWriter(clone_from=self.reader)
+        if not keep_existing_fields:
+            self.clear_existing_fields()
         # Keep reader open until we're done - pypdf uses lazy loading
 
         zapf_font = DictionaryObject(
@@ -128,6 +155,13 @@ class PyPdfFormCreator:
             }
         )
         self.zapf_font = self.writer._add_object(zapf_font)
+        # per-page rect_for constants, filled in lazily
+        self._metrics: dict[int, tuple[float, float, float, float]] = {}
+
+    def _metrics_for(self, page: int) -> tuple[float, float, float, float]:
+        if page not in self._metrics:
+            self._metrics[page] = _page_metrics(self.writer.pages[page])
+        return self._metrics[page]
 
     def clear_existing_fields(self):
         """Clear all existing form fields from the PDF."""
@@ -146,6 +180,45 @@ class PyPdfFormCreator:
             if NameObject("/Annots") in page:
                 page[NameObject("/Annots")] = ArrayObject()
 
+    def make_text_box(
+        self,
+        name: str,
+        page: int,
+        bounding_box: BoundingBox,
+        multiline: bool = False,
+    ) -> Textbox:
+        rect = rect_for(bounding_box, self._metrics_for(page))
+        return Textbox(name=name, rect=rect, multiline=multiline)
+
+    def make_checkbox(self, name: str, page: int, bounding_box: BoundingBox) -> Checkbox:
+        rect = rect_for(bounding_box, self._metrics_for(page))
+        return Checkbox(name=name, rect=rect)
+
+    def make_signature(self, name: str, page: int, bounding_box: BoundingBox) -> Signature:
+        rect = rect_for(bounding_box, self._metrics_for(page))
+        return Signature(name=name, rect=rect)
+
+    def add_annotations_for_page(
+        self, page_number: int, annotations: list[AnnotationDictionary]
+    ) -> None:
+        """
+        Attach a batch of annotations to one page. Resolves the page and its
+        /Annots array once instead of per annotation, which matters on pages
+        with many detected widgets.
+        """
+        if not annotations:
+            return
+
+        page = self.writer.pages[page_number]
+        if page.annotations is None:
+            page[NameObject("/Annots")] = ArrayObject()
+
+        refs = []
+        for annotation in annotations:
+            annotation[NameObject("/P")] = page.indirect_reference
+            refs.append(self.writer._add_object(annotation))
+        page.annotations.extend(refs)
+
     def add_text_box(
         self,
         name: str,
@@ -153,19 +226,15 @@ class PyPdfFormCreator:
         bounding_box: BoundingBox,
         multiline: bool = False,
     ) -> None:
-        rect = rect_for(bounding_box, self.writer.pages[page])
-        textbox = Textbox(name=name, rect=rect, multiline=multiline)
-        self.writer.add_annotation(page_number=page, annotation=textbox)
+        self.add_annotations_for_page(
+            page, [self.make_text_box(name, page, bounding_box, multiline)]
+        )
 
     def add_checkbox(self, name: str, page: int, bounding_box: BoundingBox) -> None:
-        rect = rect_for(bounding_box, self.writer.pages[page])
-        checkbox = Checkbox(name=name, rect=rect)
-        self.writer.add_annotation(page_number=page, annotation=checkbox)
+        self.add_annotations_for_page(page, [self.make_checkbox(name, page, bounding_box)])
 
     def add_signature(self, name: str, page: int, bounding_box: BoundingBox) -> None:
-        rect = rect_for(bounding_box, self.writer.pages[page])
-        signature = Signature(name=name, rect=rect)
-        self.writer.add_annotation(page_number=page, annotation=signature)
+        self.add_annotations_for_page(page, [self.make_signature(name, page, bounding_box)])
 
     def save(self, output_path: str) -> None:
         self.writer.reattach_fields()
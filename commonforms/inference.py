@@ -1,97 +1,232 @@
 from __future__ import annotations
+from typing import Iterator, Literal
 from ultralytics import YOLO
 from pathlib import Path
 from huggingface_hub import hf_hub_download
 
+import functools
+import numpy as np
+import queue
+import threading
+import torch
+import zipfile
+
 from commonforms.utils import BoundingBox, Page, Widget
 from commonforms.form_creator import PyPdfFormCreator
+from commonforms.daemon import infer_via_daemon
 from commonforms.exceptions import EncryptedPdfError
 
 import formalpdf
 import pypdfium2
 
 
-# our mapping from (model_name, fast) to (repo_id, filename) for the huggingface hub
+# our mapping from (model_name, variant) to (repo_id, filename) for the
+# huggingface hub; the variant is `fast` (True for ONNX, False for pt) or a
+# string naming an alternative build of the fast model (quantized/openvino)
 models = {
     ("FFDNET-S", True): ("jbarrow/FFDNet-S-cpu", "FFDNet-S.onnx"),
     ("FFDNET-S", False): ("jbarrow/FFDNet-S", "FFDNet-S.pt"),
     ("FFDNET-L", True): ("jbarrow/FFDNet-L-cpu", "FFDNet-L.onnx"),
     ("FFDNET-L", False): ("jbarrow/FFDNet-L", "FFDNet-L.pt"),
+    ("FFDNET-L", "int8"): ("jbarrow/FFDNet-L-int8", "FFDNet-L.int8.onnx"),
+    ("FFDNET-L", "openvino"): (
+        "jbarrow/FFDNet-L-openvino",
+        "FFDNet-L_openvino_model.zip",
+    ),
 }
 
 
+def _extract_openvino_model(zip_path: str) -> str:
+    """
+    OpenVINO models ship as a zipped `*_openvino_model/` directory (the
+    layout YOLO.export produces); unzip next to the download once and return
+    the directory path that YOLO can load directly.
+    """
+    parent = Path(zip_path).parent.resolve()
+    target = parent / Path(zip_path).stem
+    if not target.exists():
+        with zipfile.ZipFile(zip_path) as archive:
+            for member in archive.namelist():
+                # refuse zip-slip entries that would escape the model cache
+                if not (parent / member).resolve().is_relative_to(parent):
+                    raise ValueError(
+                        f"refusing to extract {member!r} outside the model cache"
+                    )
+            archive.extractall(parent)
+    if not target.is_dir():
+        raise ValueError(
+            f"{Path(zip_path).name} did not contain a {target.name}/ directory"
+        )
+    return str(target)
+
+
+def _device_type(device: int | str) -> str:
+    # ultralytics accepts bare CUDA ordinals like 0 or "0" as well as the
+    # usual torch device strings
+    if isinstance(device, int) or str(device).isdigit():
+        return "cuda"
+    return torch.device(str(device)).type
+
+
+@functools.lru_cache(maxsize=8)
+def _download_model(repo_id: str, filename: str) -> str:
+    # hf_hub_download does a network HEAD even on cache hits, so remember the
+    # resolved path for the lifetime of the process
+    return hf_hub_download(repo_id=repo_id, filename=filename)
+
+
+@functools.lru_cache(maxsize=4)
+def _load_yolo(model_path: str) -> YOLO:
+    # constructing a detector is cheap when the underlying weights have
+    # already been loaded once (e.g. repeated runs from the Streamlit app)
+    return YOLO(model_path, task="detect")
+
+
+@functools.lru_cache(maxsize=4)
+def _model_lock(model_path: str) -> threading.Lock:
+    # the cached YOLO objects get shared across threads (Streamlit sessions,
+    # daemon handlers), but ultralytics predictors keep mutable per-call
+    # state, so predict calls on one model must be serialized
+    return threading.Lock()
+
+
 class FFDNetDetector:
     def __init__(
-        self, model_or_path: str, device: int | str = "cpu", fast: bool = False
+        self,
+        model_or_path: str,
+        device: int | str = "cpu",
+        fast: bool | Literal["openvino"] = False,
+        precision: Literal["fp32", "bf16", "fp16", "int8"] = "bf16",
     ) -> None:
         self.device = device
         self.fast = fast
+        self.precision = precision
 
-        model_path = self.get_model_path(model_or_path, device, fast)
-        self.model = YOLO(model_path, task="detect")
+        model_path = self.get_model_path(model_or_path, device, fast, precision)
+        self.model = _load_yolo(model_path)
+        self._predict_lock = _model_lock(model_path)
 
         self.id_to_cls = {0: "TextBox", 1: "ChoiceButton", 2: "Signature"}
 
     def get_model_path(
-        self, model_or_path: str, device: int | str = "cpu", fast: bool = False
+        self,
+        model_or_path: str,
+        device: int | str = "cpu",
+        fast: bool | Literal["openvino"] = False,
+        precision: str = "fp32",
     ) -> str:
         """
         Construct the path to the model weights based on:
          (a) the requested model (in the package or external path)
-         (b) --fast (if enabled, use ONNX, otherwise use pt)
+         (b) --fast (if enabled, use ONNX, otherwise use pt; the string
+             "openvino" selects the OpenVINO IR build instead)
+         (c) --precision (int8 selects a statically quantized ONNX build,
+             which only exists for the fast path)
         """
         model_upper = model_or_path.upper()
         if model_upper in ["FFDNET-S", "FFDNET-L"]:
+            variant = fast
+            if fast == "openvino" and (model_upper, "openvino") not in models:
+                raise ValueError(
+                    f"no OpenVINO build is published for {model_or_path}; "
+                    "rerun without --openvino"
+                )
+            if precision == "int8":
+                if fast is not True:
+                    raise ValueError("precision='int8' requires fast=True")
+                if (model_upper, "int8") not in models:
+                    raise ValueError(
+                        f"no INT8 build is published for {model_or_path}; "
+                        "rerun without --precision int8"
+                    )
+                variant = "int8"
             # download the model, will just use the cached version if it already exists
-            repo_id, filename = models[(model_upper, fast)] 
-            model_path = hf_hub_download(repo_id=repo_id, filename=filename) 
+            repo_id, filename = models[(model_upper, variant)]
+            try:
+                model_path = _download_model(repo_id, filename)
+            except Exception as exc:
+                if isinstance(variant, str):
+                    raise ValueError(
+                        f"could not download the {variant} build of "
+                        f"{model_or_path} from {repo_id}; rerun without the "
+                        f"{variant} option"
+                    ) from exc
+                raise
+            if variant == "openvino":
+                model_path = _extract_openvino_model(model_path)
         else:
             model_path = model_or_path
 
         return model_path
 
     def extract_widgets(
-        self, pages: list[Page], confidence: float = 0.3, image_size: int = 1600
+        self,
+        pages: list[Page],
+        confidence: float = 0.3,
+        image_size: int = 1600,
+        augment: bool = False,
+        page_offset: int = 0,
     ) -> dict[int, list[Widget]]:
         if self.fast:
-            # overrides the image size to 1216, since that's all ONNX supports
-            results = [
-                self.model.predict(
-                    p.image, iou=1, conf=confidence, augment=False, imgsz=1216
-                )
-                for p in pages
-            ]
+            # overrides the image size to 1216, since that's all ONNX supports.
+            # The published FFDNet-*.onnx exports are static with a batch dim
+            # of 1, and ultralytics stacks an in-memory image list into one
+            # tensor for a single session.run — which ORT rejects against the
+            # (1,3,1216,1216) input — so pages go through predict one at a time.
+            with self._predict_lock:
+                results = [
+                    self.model.predict(
+                        p.image, iou=1, conf=confidence, augment=False, imgsz=1216
+                    )
+                    for p in pages
+                ]
         else:
-            results = self.model.predict(
-                [p.image for p in pages],
-                iou=0.1,
-                conf=confidence,
-                augment=True,
-                imgsz=image_size,
-                device=self.device,
+            # bf16/fp16 autocast halves activation bandwidth with negligible
+            # detection accuracy loss; fp32 stays selectable for reproducibility
+            device_type = _device_type(self.device)
+            autocast_dtype = (
+                torch.float16 if self.precision == "fp16" else torch.bfloat16
             )
+            with self._predict_lock, torch.autocast(
+                device_type=device_type,
+                dtype=autocast_dtype,
+                enabled=self.precision in ("bf16", "fp16"),
+            ):
+                results = self.model.predict(
+                    [p.image for p in pages],
+                    iou=0.1,
+                    conf=confidence,
+                    augment=augment,
+                    imgsz=image_size,
+                    device=self.device,
+                )
 
         widgets = {}
-        for page_ix, result in enumerate(results):
+        for batch_ix, result in enumerate(results):
+            page_ix = page_offset + batch_ix
             if isinstance(result, list):
                 result = result[0]
             # no predictions, skip page
             if result is None or result.boxes is None:
                 continue
 
-            widgets[page_ix] = []
-            for box in result.boxes.cpu().numpy():
-                x, y, w, h = box.xywhn[0]
-                cls_id = int(box.cls.item())
-                widget_type = self.id_to_cls[cls_id]
-
-                widgets[page_ix].append(
-                    Widget(
-                        widget_type=widget_type,
-                        bounding_box=BoundingBox.from_yolo(cx=x, cy=y, w=w, h=h),
-                        page=page_ix,
-                    )
+            # do the coordinate conversion and class cast on-device, then
+            # pull the boxes over as exactly two contiguous device-to-host
+            # copies instead of iterating per-box wrapper objects
+            boxes = result.boxes
+            xyxyn = boxes.xyxyn.cpu().numpy()
+            cls_ids = boxes.cls.to(torch.int32).cpu().numpy()
+
+            widgets[page_ix] = [
+                Widget(
+                    widget_type=self.id_to_cls[cls_id],
+                    bounding_box=BoundingBox(
+                        x0=float(x0), y0=float(y0), x1=float(x1), y1=float(y1)
+                    ),
+                    page=page_ix,
                 )
+                for (x0, y0, x1, y1), cls_id in zip(xyxyn, cls_ids)
+            ]
 
             # do our best to sort the widgets into something resembling reading
             # order; this is important for being able to Tab/Shift-Tab back and
@@ -106,55 +241,187 @@ def sort_widgets(widgets: list[Widget]) -> list[Widget]:
     Sort widgets in approximate reading order (left-to-right/top-to-bottom)
     which makes the LLMs less likely to mess up.
     """
-    # Sort first by y coordinate, then x coordinate for reading order
-    sorted_widgets = sorted(
-        widgets,
-        key=lambda w: (
-            round(
-                w.bounding_box.y0, 3
-            ),  # Round to handle minor vertical alignment differences
-            w.bounding_box.x0,
-        ),
-    )
+    if not widgets:
+        return widgets
 
-    # Find rows of widgets by grouping those with similar y coordinates
-    y_threshold = 0.01  # Threshold for considering widgets on same line
-    lines = []
-    current_line = []
-
-    for widget in sorted_widgets:
-        if (
-            not current_line
-            or abs(widget.bounding_box.y0 - current_line[0].bounding_box.y0)
-            < y_threshold
-        ):
-            current_line.append(widget)
-        else:
-            # Sort widgets in line by x coordinate
-            current_line.sort(key=lambda w: w.bounding_box.x0)
-            lines.append(current_line)
-            current_line = [widget]
+    n = len(widgets)
+    y0 = np.fromiter((w.bounding_box.y0 for w in widgets), dtype=np.float64, count=n)
+    x0 = np.fromiter((w.bounding_box.x0 for w in widgets), dtype=np.float64, count=n)
+
+    # group into lines the way the original two-pass loop did: walk widgets
+    # in y order and start a new line once y0 drifts a threshold away from
+    # the first widget of the current line (absolute buckets would split
+    # widgets that straddle a bucket boundary)
+    y_threshold = 0.01
+    line = np.empty(n, dtype=np.int32)
+    current = -1
+    line_start = -np.inf
+    for ix in np.argsort(y0, kind="stable"):
+        if y0[ix] - line_start >= y_threshold:
+            current += 1
+            line_start = y0[ix]
+        line[ix] = current
+
+    # then order by (line, x) with a single C-level lexsort
+    order = np.lexsort((x0, line))
+    return [widgets[i] for i in order]
 
-    if current_line:
-        current_line.sort(key=lambda w: w.bounding_box.x0)
-        lines.append(current_line)
 
-    # Flatten the lines back into single list
-    return [widget for line in lines for widget in line]
+def _page_dpi(width_pt: float, height_pt: float, target_size: int) -> int:
+    # pdfium takes a dpi where 72 renders 1 pixel per point
+    return max(1, round(72 * target_size / max(width_pt, height_pt)))
 
 
-def render_pdf(pdf_path: str) -> list[Page]:
-    pages = []
-    doc = formalpdf.open(pdf_path)
+def _shared_dpi(doc, target_size: int) -> int | None:
+    """
+    When every page in the document has the same size (the common case for
+    forms), return the single dpi to render them all at; None otherwise.
+    Rendering homogeneous documents at one dpi guarantees identical raster
+    shapes, which keeps the model running at a single static input shape
+    instead of re-planning per page. Sizes come from pdfium's
+    get_page_size, which reads the page tree without loading any page.
+    """
+    sizes = {doc.document.get_page_size(index) for index in range(len(doc))}
+    if len(sizes) != 1:
+        return None
+    ((width_pt, height_pt),) = sizes
+    return _page_dpi(width_pt, height_pt, target_size)
+
+
+def _render_page(page, target_size: int, dpi: int | None = None) -> Page:
+    # rasterize at the model's input resolution so the model's internal
+    # resize is a near no-op
+    if dpi is None:
+        width_pt, height_pt = page.parent.document.get_page_size(page.number)
+        dpi = _page_dpi(width_pt, height_pt, target_size)
+    image = page.render(dpi=dpi)
+    return Page(image=image, width=image.width, height=image.height)
+
+
+def stream_render(pdf: str | Path | bytes, target_size: int = 1600) -> Iterator[Page]:
+    """
+    Rasterize pages one at a time as a generator, so inference can start
+    before the whole document has been rendered. Accepts a path or raw PDF
+    bytes (pdfium loads either).
+    """
+    doc = formalpdf.open(pdf)
     try:
+        dpi = _shared_dpi(doc, target_size)
         for page in doc:
-            image = page.render()
-            pages.append(Page(image=image, width=image.width, height=image.height))
-        return pages
+            yield _render_page(page, target_size, dpi=dpi)
     finally:
         doc.document.close()
 
 
+def render_pdf(pdf: str | Path | bytes, target_size: int = 1600) -> list[Page]:
+    """
+    Rasterize every page of the PDF at `target_size`. Accepts a path or raw
+    PDF bytes. Pages render serially: pdfium is not thread-safe, so the
+    overlap win comes from pipelining rendering with inference (see
+    stream_render / prepare_form) rather than from rendering concurrently.
+    """
+    doc = formalpdf.open(pdf)
+    try:
+        dpi = _shared_dpi(doc, target_size)
+        return [_render_page(page, target_size, dpi=dpi) for page in doc]
+    finally:
+        doc.document.close()
+
+
+def _infer_in_process(
+    pdf_bytes: bytes,
+    *,
+    model_or_path: str,
+    device: int | str,
+    fast: bool | Literal["openvino"],
+    precision: str,
+    confidence: float,
+    image_size: int,
+    augment: bool,
+    batch_size: int,
+) -> dict[int, list[Widget]]:
+    detector = FFDNetDetector(
+        model_or_path, device=device, fast=fast, precision=precision
+    )
+
+    # pipeline rendering and inference: a producer thread rasterizes pages
+    # into a bounded queue while the main thread drains batches into the
+    # detector, so wall time approaches max(render, infer) instead of the sum
+    sentinel = object()
+    page_queue: queue.Queue = queue.Queue(maxsize=2 * batch_size)
+
+    # the fast/ONNX model always runs at 1216, so render to match
+    target_size = 1216 if fast else image_size
+
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        # bounded put that gives up once the consumer has bailed, so an
+        # inference error can't leave this thread blocked on a full queue
+        while not stop.is_set():
+            try:
+                page_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for page in stream_render(pdf_bytes, target_size=target_size):
+                if not put(page):
+                    return
+        except BaseException as exc:
+            put(exc)
+        else:
+            put(sentinel)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+
+    results: dict[int, list[Widget]] = {}
+    batch: list[Page] = []
+    page_offset = 0
+
+    def flush():
+        nonlocal page_offset
+        results.update(
+            detector.extract_widgets(
+                batch,
+                confidence=confidence,
+                image_size=image_size,
+                augment=augment,
+                page_offset=page_offset,
+            )
+        )
+        page_offset += len(batch)
+        batch.clear()
+
+    try:
+        while True:
+            item = page_queue.get()
+            if item is sentinel:
+                break
+            if isinstance(item, pypdfium2._helpers.misc.PdfiumError):
+                raise EncryptedPdfError
+            if isinstance(item, BaseException):
+                raise item
+            batch.append(item)
+            if len(batch) == batch_size:
+                flush()
+
+        if batch:
+            flush()
+    except BaseException:
+        # unblock the producer so it can close the pdfium document and exit
+        # rather than leaking the thread
+        stop.set()
+        raise
+    producer.join()
+
+    return results
+
+
 def prepare_form(
     input_path: str | Path,
     output_path: str | Path,
@@ -165,36 +432,66 @@ def prepare_form(
     device: int | str = "cpu",
     image_size: int = 1600,
     confidence: float = 0.3,
-    fast: bool = False,
+    fast: bool | Literal["openvino"] = False,
+    precision: Literal["fp32", "bf16", "fp16", "int8"] = "bf16",
+    augment: bool = False,
+    batch_size: int = 8,
 ):
-    detector = FFDNetDetector(model_or_path, device=device, fast=fast)
-
-    try:
-        pages = render_pdf(input_path)
-    except pypdfium2._helpers.misc.PdfiumError:
-        raise EncryptedPdfError
-
-    results = detector.extract_widgets(
-        pages, confidence=confidence, image_size=image_size
+    # read the file once; the same bytes feed the daemon, the renderer, and
+    # the form writer, so the document is only parsed from disk a single time
+    pdf_bytes = Path(input_path).read_bytes()
+
+    # route through a resident daemon (see commonforms.daemon) when one is
+    # listening, so repeat invocations skip the model load entirely
+    results = infer_via_daemon(
+        pdf_bytes,
+        {
+            "model_or_path": model_or_path,
+            "device": device,
+            "fast": fast,
+            "precision": precision,
+            "confidence": confidence,
+            "image_size": image_size,
+            "augment": augment,
+        },
     )
-
-    writer = PyPdfFormCreator(input_path)
-    if not keep_existing_fields:
-        writer.clear_existing_fields()
+    if results is None:
+        results = _infer_in_process(
+            pdf_bytes,
+            model_or_path=model_or_path,
+            device=device,
+            fast=fast,
+            precision=precision,
+            confidence=confidence,
+            image_size=image_size,
+            augment=augment,
+            batch_size=batch_size,
+        )
+
+    writer = PyPdfFormCreator(pdf_bytes, keep_existing_fields=keep_existing_fields)
 
     for page_ix, widgets in results.items():
+        # build every annotation for the page, then attach them in one batch
+        # so the page's /Annots array is only resolved and updated once
+        annotations = []
         for i, widget in enumerate(widgets):
             name = f"{widget.widget_type.lower()}_{widget.page}_{i}"
 
             if widget.widget_type == "TextBox":
-                writer.add_text_box(name, page_ix, widget.bounding_box)
+                annotations.append(writer.make_text_box(name, page_ix, widget.bounding_box))
             elif widget.widget_type == "ChoiceButton":
-                writer.add_checkbox(name, page_ix, widget.bounding_box)
+                annotations.append(writer.make_checkbox(name, page_ix, widget.bounding_box))
             elif widget.widget_type == "Signature":
                 if use_signature_fields:
-                    writer.add_signature(name, page_ix, widget.bounding_box)
+                    annotations.append(
+                        writer.make_signature(name, page_ix, widget.bounding_box)
+                    )
                 else:
-                    writer.add_text_box(name, page_ix, widget.bounding_box)
+                    annotations.append(
+                        writer.make_text_box(name, page_ix, widget.bounding_box)
+                    )
+
+        writer.add_annotations_for_page(page_ix, annotations)
 
     writer.save(output_path)
     writer.close()
@@ -1,11 +1,11 @@
 from __future__ import annotations
 from typing import Literal
-from pydantic import BaseModel
 from dataclasses import dataclass
 from PIL import Image
 
 
-class BoundingBox(BaseModel):
+@dataclass(slots=True, frozen=True)
+class BoundingBox:
     x0: float
     y0: float
     x1: float
@@ -16,7 +16,8 @@ class BoundingBox(BaseModel):
         return cls(x0=cx - w / 2, y0=cy - h / 2, x1=cx + w / 2, y1=cy + h / 2)
 
 
-class Widget(BaseModel):
+@dataclass(slots=True, frozen=True)
+class Widget:
     widget_type: Literal[
         "TextBox",
         "ChoiceButton",
@@ -0,0 +1,42 @@
+"""
+Export an FFDNet checkpoint to a static-shape ONNX model.
+
+With fixed batch and spatial dims (N, 3, 1216, 1216), ONNX Runtime takes the
+static-shape kernel path and skips per-call shape inference and memory
+re-planning. Pair the batch size with prepare_form's batch_size; pages render
+at a uniform shape for homogeneous-page PDFs, so the fixed dims hold on the
+common case for forms. Pass the resulting .onnx as the model path with --fast.
+
+Usage:
+    python scripts/export_static_onnx.py FFDNet-L.pt --batch 8
+"""
+
+from argparse import ArgumentParser
+from pathlib import Path
+
+from ultralytics import YOLO
+
+IMAGE_SIZE = 1216
+
+
+def main():
+    parser = ArgumentParser(description="Export FFDNet to static-shape ONNX")
+    parser.add_argument("checkpoint", type=Path, help="Path to the .pt checkpoint")
+    parser.add_argument(
+        "--batch",
+        type=int,
+        default=8,
+        help="Fixed batch dimension; match prepare_form's batch_size",
+    )
+
+    args = parser.parse_args()
+
+    model = YOLO(str(args.checkpoint), task="detect")
+    exported = model.export(
+        format="onnx", dynamic=False, imgsz=IMAGE_SIZE, batch=args.batch
+    )
+    print(f"Wrote {exported}")
+
+
+if __name__ == "__main__":
+    main()
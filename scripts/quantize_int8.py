@@ -0,0 +1,102 @@
+"""
+Statically quantize the fast (ONNX) FFDNet model to INT8.
+
+Calibration data comes from rendering the pages of a PDF (by default the test
+fixture) at the model's 1216x1216 input resolution. The resulting QDQ model is
+what gets uploaded as FFDNet-*.int8.onnx and selected with --precision int8.
+
+Usage:
+    python scripts/quantize_int8.py FFDNet-L.onnx FFDNet-L.int8.onnx \
+        --calibration-pdf tests/resources/input.pdf
+"""
+
+from argparse import ArgumentParser
+from pathlib import Path
+
+import numpy as np
+import onnx
+import onnxruntime
+from PIL import Image
+from onnxruntime.quantization import (
+    CalibrationDataReader,
+    QuantFormat,
+    QuantType,
+    quantize_static,
+)
+
+from commonforms.inference import render_pdf
+
+IMAGE_SIZE = 1216
+
+
+class PdfPageDataReader(CalibrationDataReader):
+    """Feeds rendered PDF pages, preprocessed to NCHW float32, as calibration data."""
+
+    def __init__(self, pdf_path: str, input_name: str):
+        pages = render_pdf(pdf_path)
+        self.input_name = input_name
+        self.batches = iter([{input_name: self.preprocess(p.image)} for p in pages])
+
+    @staticmethod
+    def preprocess(image: Image.Image) -> np.ndarray:
+        # match ultralytics inference preprocessing: aspect-preserving resize
+        # onto a gray (114) letterbox canvas, scaled to [0,1] NCHW — the
+        # activation ranges must be calibrated on the same input distribution
+        # the quantized model sees at inference
+        image = image.convert("RGB")
+        scale = IMAGE_SIZE / max(image.size)
+        resized = image.resize(
+            (
+                max(1, round(image.width * scale)),
+                max(1, round(image.height * scale)),
+            )
+        )
+        canvas = Image.new("RGB", (IMAGE_SIZE, IMAGE_SIZE), (114, 114, 114))
+        canvas.paste(
+            resized,
+            (
+                (IMAGE_SIZE - resized.width) // 2,
+                (IMAGE_SIZE - resized.height) // 2,
+            ),
+        )
+        array = np.asarray(canvas, dtype=np.float32) / 255.0
+        return array.transpose(2, 0, 1)[np.newaxis]
+
+    def get_next(self):
+        return next(self.batches, None)
+
+
+def main():
+    parser = ArgumentParser(description="Quantize an FFDNet ONNX model to INT8")
+    parser.add_argument("model_fp32", type=Path, help="Path to the FP32 .onnx model")
+    parser.add_argument("model_int8", type=Path, help="Where to write the INT8 model")
+    parser.add_argument(
+        "--calibration-pdf",
+        type=Path,
+        default=Path("tests/resources/input.pdf"),
+        help="PDF whose rendered pages are used for activation calibration",
+    )
+
+    args = parser.parse_args()
+
+    session = onnxruntime.InferenceSession(
+        str(args.model_fp32), providers=["CPUExecutionProvider"]
+    )
+    input_name = session.get_inputs()[0].name
+
+    quantize_static(
+        str(args.model_fp32),
+        str(args.model_int8),
+        PdfPageDataReader(str(args.calibration_pdf), input_name),
+        quant_format=QuantFormat.QDQ,
+        per_channel=True,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+    )
+
+    onnx.checker.check_model(str(args.model_int8))
+    print(f"Wrote {args.model_int8}")
+
+
+if __name__ == "__main__":
+    main()
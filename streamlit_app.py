@@ -7,6 +7,13 @@ from commonforms.utils import BoundingBox
 
 st.title("CommonForms Interactive Field Detector")
 
+
+@st.cache_resource
+def load_detector(model_name: str) -> FFDNetDetector:
+    # keep the detector (and its loaded weights) alive across reruns
+    return FFDNetDetector(model_name)
+
+
 # File upload
 uploaded_file = st.file_uploader("Upload a PDF", type="pdf")
 
@@ -22,7 +29,7 @@ if uploaded_file is not None:
     # Detect fields
     if st.button("Detect Fields"):
         with st.spinner("Detecting form fields..."):
-            detector = FFDNetDetector("FFDNet-L")
+            detector = load_detector("FFDNet-L")
             pages = render_pdf(input_path)
             widgets_by_page = detector.extract_widgets(pages, confidence=confidence)
             
@@ -86,8 +93,9 @@ if uploaded_file is not None:
                 with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as output_file:
                     output_path = output_file.name
                 
-                form_creator = PyPdfFormCreator(st.session_state.input_path)
-                form_creator.clear_existing_fields()
+                form_creator = PyPdfFormCreator(
+                    st.session_state.input_path, keep_existing_fields=False
+                )
                 
                 for i, detection in enumerate(selected_detections):
                     field_name = f"{detection.widget_type.lower()}_{i}"
@@ -0,0 +1,71 @@
+import os
+import pickle
+import socket
+import threading
+
+from commonforms.daemon import infer_via_daemon
+
+
+def test_daemon_round_trip(tmp_path, monkeypatch):
+    # stub server implementing one exchange of the daemon wire protocol
+    sock_path = str(tmp_path / "ffdnet.sock")
+    monkeypatch.setenv("COMMONFORMS_SOCKET", sock_path)
+
+    ready = threading.Event()
+    received = {}
+
+    def serve_one():
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+            server.bind(sock_path)
+            os.chmod(sock_path, 0o600)
+            server.listen(1)
+            ready.set()
+            conn, _ = server.accept()
+            with conn, conn.makefile("rwb") as stream:
+                pdf_bytes, options = pickle.load(stream)
+                received["pdf_bytes"] = pdf_bytes
+                received["options"] = options
+                pickle.dump({"results": {0: []}}, stream)
+                stream.flush()
+
+    server_thread = threading.Thread(target=serve_one)
+    server_thread.start()
+    assert ready.wait(timeout=5)
+
+    results = infer_via_daemon(b"%PDF-1.4", {"confidence": 0.5})
+    server_thread.join(timeout=5)
+
+    assert results == {0: []}
+    assert received["pdf_bytes"] == b"%PDF-1.4"
+    assert received["options"]["confidence"] == 0.5
+
+
+def test_daemon_missing_socket_falls_back(tmp_path, monkeypatch):
+    monkeypatch.setenv("COMMONFORMS_SOCKET", str(tmp_path / "missing.sock"))
+
+    assert infer_via_daemon(b"%PDF-1.4", {}) is None
+
+
+def test_daemon_error_response_falls_back(tmp_path, monkeypatch):
+    sock_path = str(tmp_path / "ffdnet.sock")
+    monkeypatch.setenv("COMMONFORMS_SOCKET", sock_path)
+
+    ready = threading.Event()
+
+    def serve_one():
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+            server.bind(sock_path)
+            server.listen(1)
+            ready.set()
+            conn, _ = server.accept()
+            with conn, conn.makefile("rwb") as stream:
+                pickle.load(stream)
+                pickle.dump({"error": "boom"}, stream)
+                stream.flush()
+
+    server_thread = threading.Thread(target=serve_one)
+    server_thread.start()
+    assert ready.wait(timeout=5)
+
+    assert infer_via_daemon(b"%PDF-1.4", {}) is None
+    server_thread.join(timeout=5)
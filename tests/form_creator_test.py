@@ -0,0 +1,39 @@
+from pathlib import Path
+
+import pypdf
+
+from commonforms.form_creator import PyPdfFormCreator
+from commonforms.utils import BoundingBox
+
+
+def test_form_creator_accepts_bytes(tmp_path):
+    pdf_bytes = Path("./tests/resources/input.pdf").read_bytes()
+    output_path = tmp_path / "output.pdf"
+
+    creator = PyPdfFormCreator(pdf_bytes, keep_existing_fields=False)
+    creator.add_text_box(
+        "textbox_0_0", 0, BoundingBox(x0=0.1, y0=0.1, x1=0.4, y1=0.15)
+    )
+    creator.save(output_path)
+    creator.close()
+
+    reader = pypdf.PdfReader(output_path)
+    fields = reader.get_fields()
+    assert fields is not None
+    assert "textbox_0_0" in fields
+
+
+def test_form_creator_preserves_document_metadata(tmp_path):
+    # clearing existing fields must not drop document-level structure
+    input_path = "./tests/resources/input.pdf"
+    output_path = tmp_path / "output.pdf"
+
+    creator = PyPdfFormCreator(input_path, keep_existing_fields=False)
+    creator.save(output_path)
+    creator.close()
+
+    original = pypdf.PdfReader(input_path)
+    written = pypdf.PdfReader(output_path)
+    assert len(written.pages) == len(original.pages)
+    assert written.metadata is not None
+    assert written.metadata.get("/Producer") == original.metadata.get("/Producer")
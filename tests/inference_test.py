@@ -1,10 +1,21 @@
 import commonforms
 import commonforms.exceptions
 
+from commonforms.inference import sort_widgets
+from commonforms.utils import BoundingBox, Widget
+
 import formalpdf
 import pytest
 
 
+def make_widget(x0: float, y0: float) -> Widget:
+    return Widget(
+        widget_type="TextBox",
+        bounding_box=BoundingBox(x0=x0, y0=y0, x1=x0 + 0.1, y1=y0 + 0.02),
+        page=0,
+    )
+
+
 def test_inference(tmp_path):
     # tmp_path is a built-in pythest fixture where we'll write the outputs
     output_path = tmp_path / "output.pdf"
@@ -38,6 +49,31 @@ def test_encrypted_failure(tmp_path):
         commonforms.prepare_form("./tests/resources/encrypted.pdf", output_path)
 
 
+def test_sort_widgets_reading_order():
+    top = make_widget(0.3, 0.1)
+    bottom_left = make_widget(0.1, 0.5)
+    bottom_right = make_widget(0.5, 0.5)
+
+    assert sort_widgets([bottom_right, bottom_left, top]) == [
+        top,
+        bottom_left,
+        bottom_right,
+    ]
+
+
+def test_sort_widgets_same_line_across_threshold_boundary():
+    # these straddle a 0.01 multiple but are well within the same-line
+    # threshold of each other, so they sort by x as one line
+    left = make_widget(0.1, 0.012)
+    right = make_widget(0.5, 0.008)
+
+    assert sort_widgets([right, left]) == [left, right]
+
+
+def test_sort_widgets_empty():
+    assert sort_widgets([]) == []
+
+
 # TODO(joe): future tests around handling encrypted PDFs
 #   1. add a --password flag and test that inference doesn't fail
 #   2. if a password is provided, ensure that the _output_ PDF remains encrpyted 